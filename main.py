@@ -1,9 +1,40 @@
+import functools
 import numpy as np
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+from matplotlib.transforms import Bbox
 import tkinter as tk
 from tkinter import ttk
 
+try:
+    from wave_kernel import tri_chord as _tri_chord
+except ImportError:
+    _tri_chord = None
+
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+LUT_SIZE = 4096
+PHASE_BITS = 16
+
+def triangle_period(size=LUT_SIZE):
+    """Sample one period of a triangle wave into a lookup table"""
+    phase = np.arange(size) / size
+    return (2 * np.abs(2 * (phase - np.floor(phase + 0.5))) - 1).astype(np.float32)
+
+if _tri_chord is None and njit is not None:
+    @njit(cache=True, fastmath=True)
+    def _tri_chord(lut, steps, out):
+        """Sum wavetable voices into out in a single fused pass"""
+        mask = lut.size - 1
+        for i in range(out.size):
+            s = np.float32(0.0)
+            for k in range(steps.size):
+                s += lut[((i * steps[k]) >> PHASE_BITS) & mask]
+            out[i] = s
+
 class PianoGUI:
     def __init__(self, root):
         self.root = root
@@ -12,49 +43,96 @@ class PianoGUI:
         #musti ozdil
         self.fs = 44100
         self.duration = 0.05
-        self.t = np.linspace(0, self.duration, int(self.fs * self.duration))
+        # Sample i sits at i/fs, matching the wavetable's fixed-point phase
+        self.t = np.linspace(0, self.duration, int(self.fs * self.duration), endpoint=False, dtype=np.float32)
+        self._scratch = np.zeros_like(self.t)
+        self._absbuf = np.empty_like(self.t)
+        self._time_ms = (self.t * 1000).astype(np.float32)
+        
+        # Wavetable synthesis: one precomputed period indexed at a per-frequency stride
+        self.LUT = triangle_period(LUT_SIZE)
+        self.idx_base = np.arange(len(self.t), dtype=np.int64)
+        if _tri_chord is not None:
+            # Compile (or load from cache) up front rather than on the first click
+            _tri_chord(self.LUT, self.phase_steps([440.0]), self._scratch)
         
         self.octave = 4
         self.current_wave = None
         
-        self.held_notes = set()
+        self.held_notes = {}
         self.held_buttons = {}
+        self._pending_redraw = False
+        self._last_key = None
         
-        self.base_frequencies = [
+        self.base_frequencies = np.array([
             16.35, 17.32, 18.35, 19.45, 20.60, 21.83, 23.12, 24.50, 25.96, 27.50, 29.14, 30.87
-        ]
+        ], dtype=np.float32)
+        
+        # Frequencies of every reachable note: octaves 0-8 plus the keyboard's second octave
+        octave_scale = 2.0 ** np.arange(10, dtype=np.float32)
+        self.freq_table = (octave_scale[:, None] * self.base_frequencies).ravel()
+        self._octave_freqs = None
+        self._octave_freqs_octave = None
+        
+        # Per-instance memo cache; freq_table bounds it to 120 distinct notes
+        self._wave_cache = functools.lru_cache(maxsize=256)(self._synthesize_wave)
+        
         self.setup_wave_display()
         self.setup_controls()
         self.setup_piano()
         
-    def get_frequency(self, note_index):
-        """Get frequency for a note in the current octave"""
-        base_freq = self.base_frequencies[note_index]
-        return base_freq * (2 ** self.octave)
+    def get_frequency(self):
+        """Get frequencies of the keyboard's two octaves starting at the current octave"""
+        if self._octave_freqs_octave != self.octave:
+            start = self.octave * 12
+            self._octave_freqs = self.freq_table[start:start + 24]
+            self._octave_freqs_octave = self.octave
+        return self._octave_freqs
+    
+    def phase_steps(self, frequency):
+        """Fixed-point phase increment per sample, in wavetable entries"""
+        return (np.asarray(frequency, dtype=np.float64) * (LUT_SIZE / self.fs * (1 << PHASE_BITS))).astype(np.int64)
     
-    def triangle_wave(self, frequency, t):
-        """Generate a continuous triangle wave"""
-        phase = t * frequency
-        triangle = 2 * np.abs(2 * (phase - np.floor(phase + 0.5))) - 1
-        return triangle
+    def triangle_wave(self, frequency):
+        """Generate continuous triangle waves over self.t by wavetable lookup (one row per frequency)"""
+        step = self.phase_steps(frequency)
+        idx = ((self.idx_base * step[..., None]) >> PHASE_BITS) & (LUT_SIZE - 1)
+        return self.LUT[idx]
+    
+    def _synthesize_wave(self, frequency):
+        """Generate a read-only triangle wave for the wave cache"""
+        if _tri_chord is not None:
+            # Single voice through the fused kernel: no index temporaries, peak is already 1
+            wave = np.empty_like(self.t)
+            _tri_chord(self.LUT, self.phase_steps([frequency]), wave)
+        else:
+            wave = self.triangle_wave(frequency)
+        wave.setflags(write=False)
+        return wave
     
     def generate_wave(self, frequency):
-        """Generate a continuous triangle wave"""
-        return self.triangle_wave(frequency, self.t)
+        """Generate a continuous triangle wave, reusing cached waves"""
+        return self._wave_cache(round(float(frequency), 4))
     
     def generate_chord_wave(self, frequencies):
         """Generate a combined wave from multiple frequencies (chord)"""
-        if not frequencies:
-            return np.zeros_like(self.t)
-        
-        wave = np.zeros_like(self.t)
-        for freq in frequencies:
-            wave += self.triangle_wave(freq, self.t)
-        
-        if np.max(np.abs(wave)) > 0:
-            wave = wave / np.max(np.abs(wave))
-        
-        return wave
+        wave = self._scratch
+        if len(frequencies) == 0:
+            wave.fill(0)
+        else:
+            if _tri_chord is not None:
+                _tri_chord(self.LUT, self.phase_steps(frequencies), wave)
+            else:
+                np.sum(self.triangle_wave(frequencies), axis=0, out=wave)
+            
+            peak = np.abs(wave, out=self._absbuf).max()
+            if peak > 0:
+                np.divide(wave, peak, out=wave)
+        
+        # Callers only read the result; the buffer is reused by the next call
+        view = wave.view()
+        view.setflags(write=False)
+        return view
     
     def setup_wave_display(self):
         """Setup the wave visualization display"""
@@ -72,26 +150,89 @@ class PianoGUI:
         self.ax.spines['left'].set_color('white')
         self.ax.set_xlabel('Time (ms)', color='white', fontsize=10)
         self.ax.set_ylabel('Amplitude', color='white', fontsize=10)
-        self.ax.set_title('Sound Wave Visualization', color='white', fontsize=12, pad=10)
         self.ax.grid(True, alpha=0.3, color='gray')
         
-        self.line, = self.ax.plot([], [], color='#00ff88', linewidth=1.5)
+        # Line and title are animated so they can be blitted over a cached background
+        self.line, = self.ax.plot([], [], color='#00ff88', linewidth=1.5, animated=True)
+        # The time axis only changes with the plot's pixel width; updates push new y-data
+        self.line.set_xdata(self._time_ms)
+        self.line.set_ydata(np.full_like(self._time_ms, np.nan))
+        self._decim_width = None
+        self._decim_starts = None
+        self.title_text = self.ax.text(0.5, 1.03, 'Sound Wave Visualization', transform=self.ax.transAxes,
+                                       ha='center', va='bottom', color='white', fontsize=12, animated=True,
+                                       clip_on=True)
         
         self.canvas = FigureCanvasTkAgg(self.fig, wave_frame)
-        self.canvas.draw()
+        # Full redraws (startup, widget resize) re-capture the background
+        self.bg = None
+        self.canvas.mpl_connect('draw_event', self.capture_background)
+        self.canvas.draw_idle()
         self.canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
     
+    def capture_background(self, event=None):
+        """Cache the static parts of the plot after a full redraw"""
+        if self.update_decimation():
+            wave = self.current_wave if self.current_wave is not None else np.full_like(self.t, np.nan)
+            self.set_line_wave(wave)
+        # Blit region: the axes plus the strip above them holding the title,
+        # which is clipped to it so nothing is drawn outside the blitted area
+        ax_box = self.ax.bbox
+        self.blit_bbox = Bbox.union([ax_box, Bbox([[ax_box.x0, ax_box.y1], [ax_box.x1, self.fig.bbox.y1]])])
+        self.title_text.set_clip_box(self.blit_bbox)
+        self.bg = self.canvas.copy_from_bbox(self.blit_bbox)
+        self.draw_animated()
+    
+    def update_decimation(self):
+        """Rebuild the min/max decimation buckets when the plot width changes"""
+        width = int(self.ax.bbox.width)
+        if width == self._decim_width:
+            return False
+        self._decim_width = width
+        
+        if 0 < width and len(self.t) > 2 * width:
+            # One bucket per pixel column, drawn as a vertical min-max segment
+            self._decim_starts = np.linspace(0, len(self.t), width, endpoint=False).astype(np.intp)
+            self._decim_y = np.empty(2 * width, dtype=np.float32)
+            self.line.set_xdata(np.repeat(self._time_ms[self._decim_starts], 2))
+        else:
+            self._decim_starts = None
+            self.line.set_xdata(self._time_ms)
+        return True
+    
+    def set_line_wave(self, wave):
+        """Set the line's y-data, decimated to the plot's pixel width"""
+        if self._decim_starts is None:
+            self.line.set_ydata(wave)
+            return
+        np.minimum.reduceat(wave, self._decim_starts, out=self._decim_y[0::2])
+        np.maximum.reduceat(wave, self._decim_starts, out=self._decim_y[1::2])
+        self.line.set_ydata(self._decim_y)
+    
+    def draw_animated(self):
+        """Draw the artists excluded from the cached background"""
+        self.ax.draw_artist(self.line)
+        self.ax.draw_artist(self.title_text)
+    
+    def blit_wave(self):
+        """Restore the cached background and redraw only the animated artists"""
+        if self.bg is None:
+            # No background yet; the pending full redraw will draw the artists
+            self.canvas.draw_idle()
+            return
+        self.canvas.restore_region(self.bg)
+        self.draw_animated()
+        self.canvas.blit(self.blit_bbox)
+    
     def update_wave_display(self, wave, note_names):
         """Update the wave display with new data"""
-        time_ms = self.t * 1000
-        
-        self.line.set_data(time_ms, wave)
+        self.set_line_wave(wave)
         if isinstance(note_names, list):
             title = f'Chord: {", ".join(note_names)}' if len(note_names) > 1 else f'Note: {note_names[0]}'
         else:
             title = f'Note: {note_names}'
-        self.ax.set_title(title, color='white', fontsize=12, pad=10)
-        self.canvas.draw()
+        self.title_text.set_text(title)
+        self.blit_wave()
         self.current_wave = wave
     
     def setup_controls(self):
@@ -121,8 +262,9 @@ class PianoGUI:
         try:
             new_octave = int(self.octave_var.get())
             if 0 <= new_octave <= 8:
-                self.octave = new_octave
-                self.update_piano_labels()
+                if new_octave != self.octave:
+                    self.octave = new_octave
+                    self.update_piano_labels()
             else:
                 self.octave_var.set(str(self.octave))
         except ValueError:
@@ -139,12 +281,7 @@ class PianoGUI:
             full_note_name = f"{note_name}{self.octave + octave_offset}"
             btn.config(text=full_note_name)
             
-            btn.unbind('<Button-1>')
-            btn.unbind('<Button-3>')
-            btn.bind('<Button-1>', lambda e, idx=note_idx, name=full_note_name, b=btn: 
-                     self.play_note_left_click(idx, name, b))
-            btn.bind('<Button-3>', lambda e, idx=note_idx, name=full_note_name, b=btn: 
-                     self.hold_note_right_click(idx, name, b))
+            self._btn_meta[btn] = (note_idx, full_note_name)
         
         black_note_indices = [1, 3, 6, 8, 10] * 2
         for i, (btn, note_idx) in enumerate(self.black_buttons):
@@ -153,12 +290,17 @@ class PianoGUI:
             full_note_name = f"{note_name}{self.octave + octave_offset}"
             btn.config(text=full_note_name)
             
-            btn.unbind('<Button-1>')
-            btn.unbind('<Button-3>')
-            btn.bind('<Button-1>', lambda e, idx=note_idx, name=full_note_name, b=btn: 
-                     self.play_note_left_click(idx, name, b))
-            btn.bind('<Button-3>', lambda e, idx=note_idx, name=full_note_name, b=btn: 
-                     self.hold_note_right_click(idx, name, b))
+            self._btn_meta[btn] = (note_idx, full_note_name)
+    
+    def _on_left(self, event):
+        """Dispatch a left click to the note bound to the clicked key"""
+        note_index, note_name = self._btn_meta[event.widget]
+        self.play_note_left_click(note_index, note_name, event.widget)
+    
+    def _on_right(self, event):
+        """Dispatch a right click to the note bound to the clicked key"""
+        note_index, note_name = self._btn_meta[event.widget]
+        self.hold_note_right_click(note_index, note_name, event.widget)
     
     def setup_piano(self):
         """Setup the piano keyboard"""
@@ -171,6 +313,8 @@ class PianoGUI:
         
         self.white_buttons = []
         self.black_buttons = []
+        # Button -> (note index, note name), read by the shared click handlers
+        self._btn_meta = {}
         
         white_key_frame = tk.Frame(piano_frame, bg='#2a2a2a')
         white_key_frame.pack(side=tk.BOTTOM, fill=tk.X, padx=20, pady=(0, 10))
@@ -185,10 +329,9 @@ class PianoGUI:
                            bg='white', fg='black', font=('Arial', 10, 'bold'),
                            relief=tk.RAISED, bd=2)
             
-            btn.bind('<Button-1>', lambda e, idx=global_note_idx, name=full_note_name, b=btn: 
-                     self.play_note_left_click(idx, name, b))
-            btn.bind('<Button-3>', lambda e, idx=global_note_idx, name=full_note_name, b=btn: 
-                     self.hold_note_right_click(idx, name, b))
+            self._btn_meta[btn] = (global_note_idx, full_note_name)
+            btn.bind('<Button-1>', self._on_left)
+            btn.bind('<Button-3>', self._on_right)
             
             btn.pack(side=tk.LEFT, padx=1)
             self.white_buttons.append((btn, global_note_idx))
@@ -199,81 +342,114 @@ class PianoGUI:
         black_key_positions = [0, 1, 3, 4, 5, 7, 8, 10, 11, 12]
         black_note_indices = [1, 3, 6, 8, 10] * 2
         
-        def update_black_positions(event=None):
-            """Update black key positions based on white key layout"""
-            canvas_width = black_key_canvas.winfo_width()
-            if canvas_width < 10 or not self.white_buttons:
-                return
-            
-            white_key_width_pixels = self.white_buttons[0][0].winfo_reqwidth() if len(self.white_buttons) > 0 else 50
-            
-            total_white_width = white_key_width_pixels * 14
-            start_x = (canvas_width - total_white_width) / 2 + 20
-            
-            black_key_canvas.delete("all")
-            self.black_buttons.clear()
-            
+        self._black_items = []
+        self._last_cw = None
+        self._black_layout_job = None
+        
+        def create_black_keys():
+            """Create the black key buttons once; resizes only move them"""
             for pos_idx, white_key_pos in enumerate(black_key_positions):
                 note_idx = black_note_indices[pos_idx]
                 octave_offset = pos_idx // 5
                 note_name = note_names[note_idx]
                 full_note_name = f"{note_name}{self.octave + octave_offset}"
                 
-                x_pos = start_x + white_key_pos * white_key_width_pixels + white_key_width_pixels * 0.6
-                
                 global_note_idx = note_idx + octave_offset * 12
                 
                 btn = tk.Button(black_key_canvas, text=full_note_name, width=4, height=5,
                                bg='#1a1a1a', fg='white', font=('Arial', 8, 'bold'),
                                relief=tk.RAISED, bd=2)
                 
-                btn.bind('<Button-1>', lambda e, idx=global_note_idx, name=full_note_name, b=btn: 
-                         self.play_note_left_click(idx, name, b))
-                btn.bind('<Button-3>', lambda e, idx=global_note_idx, name=full_note_name, b=btn: 
-                         self.hold_note_right_click(idx, name, b))
+                self._btn_meta[btn] = (global_note_idx, full_note_name)
+                btn.bind('<Button-1>', self._on_left)
+                btn.bind('<Button-3>', self._on_right)
                 
-                black_key_canvas.create_window(x_pos, 10, window=btn, anchor='n')
+                item_id = black_key_canvas.create_window(0, 10, window=btn, anchor='n')
+                self._black_items.append((item_id, btn))
                 self.black_buttons.append((btn, global_note_idx))
         
-        black_key_canvas.bind('<Configure>', update_black_positions)
+        def update_black_positions(event=None):
+            """Update black key positions based on white key layout"""
+            self._black_layout_job = None
+            canvas_width = black_key_canvas.winfo_width()
+            if canvas_width < 10 or not self.white_buttons:
+                return
+            if self._last_cw is not None and abs(canvas_width - self._last_cw) < 2:
+                return
+            self._last_cw = canvas_width
+            
+            white_key_width_pixels = self.white_buttons[0][0].winfo_reqwidth() if len(self.white_buttons) > 0 else 50
+            
+            total_white_width = white_key_width_pixels * 14
+            start_x = (canvas_width - total_white_width) / 2 + 20
+            
+            if not self._black_items:
+                create_black_keys()
+            
+            for (item_id, btn), white_key_pos in zip(self._black_items, black_key_positions):
+                x_pos = start_x + white_key_pos * white_key_width_pixels + white_key_width_pixels * 0.6
+                black_key_canvas.coords(item_id, x_pos, 10)
+        
+        def schedule_black_positions(event=None):
+            """Coalesce bursts of resize events into one layout pass"""
+            if self._black_layout_job is not None:
+                self.root.after_cancel(self._black_layout_job)
+            self._black_layout_job = self.root.after(50, update_black_positions)
+        
+        black_key_canvas.bind('<Configure>', schedule_black_positions)
         self.root.after(100, update_black_positions)
     
     def get_note_frequency(self, note_index):
         """Convert note index to frequency"""
-        note_in_octave = note_index % 12
-        octave_offset = note_index // 12
-        base_frequency = self.get_frequency(note_in_octave)
-        return base_frequency * (2 ** octave_offset)
+        return self.get_frequency()[note_index]
     
     def update_display_from_held_notes(self):
         """Update the wave display based on currently held notes"""
+        # Items are kept in order since it determines the title
+        key = ('held', self.octave, tuple(self.held_notes.items()))
+        if key == self._last_key:
+            return
+        self._last_key = key
+        
         if not self.held_notes:
-            wave = np.zeros_like(self.t)
+            wave = self.generate_chord_wave([])
             self.update_wave_display(wave, "No notes")
             return
         
-        frequencies = []
-        note_names = []
-        for note_index, note_name in self.held_notes:
-            freq = self.get_note_frequency(note_index)
-            frequencies.append(freq)
-            note_names.append(note_name)
+        frequencies = self.get_frequency()[list(self.held_notes)]
+        note_names = list(self.held_notes.values())
         
         wave = self.generate_chord_wave(frequencies)
         self.update_wave_display(wave, note_names)
     
+    def _schedule_redraw(self):
+        """Redraw held notes once the Tk event queue goes idle"""
+        if not self._pending_redraw:
+            self._pending_redraw = True
+            self.root.after_idle(self._flush_redraw)
+    
+    def _flush_redraw(self):
+        """Render all held-note changes since the last redraw in one pass"""
+        self._pending_redraw = False
+        self.update_display_from_held_notes()
+    
     def play_note_left_click(self, note_index, note_name, button):
         """Left click: play note and release"""
+        key = ('play', self.octave, note_index)
+        if key == self._last_key:
+            return
+        self._last_key = key
+        
         frequency = self.get_note_frequency(note_index)
         wave = self.generate_wave(frequency)
         self.update_wave_display(wave, [note_name])
     
     def hold_note_right_click(self, note_index, note_name, button):
         """Right click: toggle hold note (add/remove from held notes)"""
-        if (note_index, note_name) in self.held_notes:
+        if note_index in self.held_notes:
             self.release_note(note_index, button)
         else:
-            self.held_notes.add((note_index, note_name))
+            self.held_notes[note_index] = note_name
             self.held_buttons[note_index] = button
             
             if button.cget('bg') == 'white':
@@ -281,21 +457,12 @@ class PianoGUI:
             else:
                 button.config(bg='#444444')
             
-            self.update_display_from_held_notes()
+            self._schedule_redraw()
     
     def release_note(self, note_index, button):
         """Release a held note"""
-        note_to_remove = None
-        for idx, name in self.held_notes:
-            if idx == note_index:
-                note_to_remove = (idx, name)
-                break
-        
-        if note_to_remove:
-            self.held_notes.remove(note_to_remove)
-        
-        if note_index in self.held_buttons:
-            del self.held_buttons[note_index]
+        self.held_notes.pop(note_index, None)
+        self.held_buttons.pop(note_index, None)
         
         current_bg = button.cget('bg')
         if current_bg in ['#cccccc', '#444444']:
@@ -306,7 +473,7 @@ class PianoGUI:
             else:
                 button.config(bg='#1a1a1a')
         
-        self.update_display_from_held_notes()
+        self._schedule_redraw()
 
 def main():
     root = tk.Tk()
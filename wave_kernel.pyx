@@ -0,0 +1,20 @@
+# cython: boundscheck=False, wraparound=False, cdivision=True, language_level=3
+# distutils: extra_compile_args = -O3 -march=native -ffast-math
+"""Compiled chord synthesis kernel for main.py
+
+Build in place with: cythonize -i wave_kernel.pyx
+"""
+
+cdef enum:
+    PHASE_BITS = 16  # must match main.PHASE_BITS
+
+cpdef void tri_chord(const float[::1] lut, const long long[::1] steps, float[::1] out) noexcept nogil:
+    """Sum wavetable voices into out in a single fused pass"""
+    cdef Py_ssize_t i, k
+    cdef long long mask = lut.shape[0] - 1
+    cdef float s
+    for i in range(out.shape[0]):
+        s = 0.0
+        for k in range(steps.shape[0]):
+            s += lut[((i * steps[k]) >> PHASE_BITS) & mask]
+        out[i] = s